@@ -1,7 +1,99 @@
+import contextlib
+import io
+import os
+import sys
+import time
 import numpy as np
-from rnn_utils import *
+from collections import namedtuple
+from functools import lru_cache
+from dataclasses import dataclass
+from rnn_utils import softmax, sigmoid, tanh_backward, cast_parameters
 
-def rnn_cell_forward(xt, a_prev, parameters):
+# Number of multiply-adds above which project_inputs runs its matmul on the GPU,
+# below it the host <-> device copies cost more than they save
+GPU_PROJECTION_THRESHOLD = 2 ** 28
+
+# Parameters bound once per sequence, with the stacked and split weights the passes need precomputed
+RNNParams = namedtuple("RNNParams", "Waa Wax Wa ba Wya by")
+LSTMParams = namedtuple("LSTMParams", "W_all b_all Wh_all Wx_all Wy by")
+
+
+@dataclass(slots = True)
+class RNNCache:
+	"""
+	Arrays stored by rnn_forward for rnn_backward, each one allocated once for the whole sequence, time-major
+	"""
+	a: np.ndarray
+	a0: np.ndarray
+	x: np.ndarray
+	parameters: RNNParams
+
+
+@dataclass(slots = True)
+class LSTMCache:
+	"""
+	Arrays stored by lstm_forward for lstm_backward, each one allocated once for the whole sequence, time-major.
+	gates holds the activated [ft; it; ot; cct] of every time-step, stacked like stack_lstm_gates
+	"""
+	a: np.ndarray
+	c: np.ndarray
+	gates: np.ndarray
+	tanh_c: np.ndarray
+	a0: np.ndarray
+	c0: np.ndarray
+	x: np.ndarray
+	parameters: LSTMParams
+
+
+@dataclass(slots = True)
+class RNNGradients:
+	"""
+	Gradients of a RNN over a whole sequence, returned by rnn_backward (see there for their shapes)
+	"""
+	dx: np.ndarray
+	da0: np.ndarray
+	dWax: np.ndarray
+	dWaa: np.ndarray
+	dba: np.ndarray
+
+
+@dataclass(slots = True)
+class LSTMGradients:
+	"""
+	Gradients of a RNN with LSTM-cell over a whole sequence, returned by lstm_backward (see there for their shapes)
+	"""
+	dx: np.ndarray
+	da0: np.ndarray
+	dWf: np.ndarray
+	dbf: np.ndarray
+	dWi: np.ndarray
+	dbi: np.ndarray
+	dWc: np.ndarray
+	dbc: np.ndarray
+	dWo: np.ndarray
+	dbo: np.ndarray
+
+
+def bind_rnn_parameters(parameters):
+	"""
+	Binds the RNN parameters once, so that the passes read them as attributes instead of dictionary lookups
+
+	Arguments:
+	parameters -- python dictionary containing Waa, Wax, Wya, ba and by (see rnn_cell_forward), or an RNNParams
+
+	Returns:
+	p -- RNNParams holding Waa, Wax, ba, Wya, by and Wa -- stacked weights [Waa, Wax], of shape (n_a, n_a + n_x)
+	"""
+
+	if isinstance(parameters, RNNParams):
+		return parameters
+
+	Waa, Wax = parameters["Waa"], parameters["Wax"]
+
+	return RNNParams(Waa, Wax, np.hstack((Waa, Wax)), parameters["ba"], parameters["Wya"], parameters["by"])
+
+
+def rnn_cell_forward(xt, a_prev, parameters, concat = None):
 	"""
 	Implements a single forward step of the RNN-cell as described in Figure (2)
 
@@ -14,6 +106,8 @@ def rnn_cell_forward(xt, a_prev, parameters):
 	                    Wya -- Weight matrix relating the hidden-state to the output, numpy array of shape (n_y, n_a)
 	                    ba --  Bias, numpy array of shape (n_a, 1)
 	                    by -- Bias relating the hidden-state to the output, numpy array of shape (n_y, 1)
+	              or the RNNParams returned by bind_rnn_parameters(parameters), to skip stacking Wa at every call
+	concat -- (optional) scratch buffer of shape (n_a + n_x, m) that receives [a_prev; xt]
 	Returns:
 	a_next -- next hidden state, of shape (n_a, m)
 	yt_pred -- prediction at timestep "t", numpy array of shape (n_y, m)
@@ -21,16 +115,21 @@ def rnn_cell_forward(xt, a_prev, parameters):
 	"""
 
 	# Retrieve parameters from "parameters"
-	Wax = parameters["Wax"]
-	Waa = parameters["Waa"]
-	Wya = parameters["Wya"]
-	ba = parameters["ba"]
-	by = parameters["by"]
+	p = bind_rnn_parameters(parameters)
+
+	# Stack a_prev and xt so that both matmuls collapse into one
+	n_a = a_prev.shape[0]
+	if concat is None:
+		concat = np.empty((n_a + xt.shape[0], xt.shape[1]), dtype = np.result_type(a_prev, xt))
+	concat[: n_a, :] = a_prev
+	concat[n_a :, :] = xt
 
 	# compute next activation state using the formula given above
-	a_next = np.tanh(np.matmul(Wax, xt) + np.matmul(Waa, a_prev) + ba)
+	a_next = np.matmul(p.Wa, concat)
+	a_next += p.ba
+	np.tanh(a_next, out = a_next)
 	# compute output of the current cell using the formula given above
-	yt_pred = softmax(np.matmul(Wya, a_next) + by)
+	yt_pred = softmax(np.matmul(p.Wya, a_next) + p.by)
 
 	# store values you need for backward propagation in cache
 	cache = (a_next, a_prev, xt, parameters)
@@ -38,6 +137,78 @@ def rnn_cell_forward(xt, a_prev, parameters):
 	return a_next, yt_pred, cache
 
 
+@lru_cache(maxsize = None)
+def load_cupy():
+	"""
+	Imports CuPy the first time a projection is large enough to run on the GPU, so that importing this module
+	neither pays for CuPy nor initialises CUDA.
+
+	Returns:
+	cp -- the cupy module, or None when CuPy or a GPU is not available (every matmul then stays on the CPU)
+	"""
+
+	try:
+		import cupy as cp
+	except ImportError:
+		return None
+
+	return cp if cp.cuda.is_available() else None
+
+
+def project_inputs(W_x, b, x):
+	"""
+	Computes the input-side pre-activations W_x xt + b of every time-step with a single (batched) matmul,
+	since they do not depend on the recurrent state. Being the largest matmul of the pass, it is the one
+	that benefits from a multithreaded BLAS (see OMP_NUM_THREADS / OPENBLAS_NUM_THREADS / MKL_NUM_THREADS),
+	or from the GPU when CuPy is available and it exceeds GPU_PROJECTION_THRESHOLD multiply-adds.
+
+	Arguments:
+	W_x -- Weights applied to the input, numpy array of shape (n, n_x)
+	b -- Bias, numpy array of shape (n, 1)
+	x -- Input data for every time-step, time-major, of shape (T_x, n_x, m).
+
+	Returns:
+	x_proj -- Projected inputs for every time-step, time-major, numpy array of shape (T_x, n, m)
+	"""
+
+	T_x, n_x, m = x.shape
+	cp = load_cupy() if W_x.shape[0] * n_x * m * T_x > GPU_PROJECTION_THRESHOLD else None
+	if cp is not None:
+		x_proj = cp.matmul(cp.asarray(W_x), cp.asarray(x))
+		x_proj += cp.asarray(b)
+		x_proj = cp.asnumpy(x_proj)
+	else:
+		x_proj = np.matmul(W_x, x)
+		x_proj += b
+
+	return x_proj
+
+
+def project_outputs(a, Wy, by):
+	"""
+	Computes the predictions softmax(Wy at + by) of every time-step with a single matmul and softmax,
+	since they do not feed back into the recurrence. All m * T_x columns are independent, so the matmul
+	spreads over the BLAS threads like project_inputs.
+
+	Arguments:
+	a -- Hidden states for every time-step, time-major, numpy array of shape (T_x, n_a, m)
+	Wy -- Weight matrix relating the hidden-state to the output, numpy array of shape (n_y, n_a)
+	by -- Bias relating the hidden-state to the output, numpy array of shape (n_y, 1)
+
+	Returns:
+	y -- Predictions for every time-step, numpy array of shape (n_y, m, T_x)
+	"""
+
+	y = np.matmul(Wy, a)
+	y += by
+
+	# softmax runs over the first axis, so apply it to the (n_y, T_x, m) view of the time-major predictions
+	y_classes = y.transpose(1, 0, 2)
+	softmax(y_classes, out = y_classes)
+
+	return y.transpose(1, 2, 0)
+
+
 def rnn_forward(x, a0, parameters):
 	"""
 	Implement the forward propagation of the recurrent neural network described in Figure (3).
@@ -51,45 +222,164 @@ def rnn_forward(x, a0, parameters):
 	                    Wya -- Weight matrix relating the hidden-state to the output, numpy array of shape (n_y, n_a)
 	                    ba --  Bias numpy array of shape (n_a, 1)
 	                    by -- Bias relating the hidden-state to the output, numpy array of shape (n_y, 1)
+	              or the RNNParams returned by bind_rnn_parameters(parameters)
 
 	Returns:
 	a -- Hidden states for every time-step, numpy array of shape (n_a, m, T_x)
 	y_pred -- Predictions for every time-step, numpy array of shape (n_y, m, T_x)
-	caches -- tuple of values needed for the backward pass, contains (list of caches, x)
-	"""
+	caches -- tuple of values needed for the backward pass, contains (RNNCache, x)
 
-	# Initialize "caches" which will contain the list of all caches
-	caches = []
+	Note: a is a view of the hidden states stored in caches, which rnn_backward reads; copy it before modifying it in place
+	"""
 
-	# Retrieve dimensions from shapes of x and parameters["Wya"]
+	# Run the whole sequence in the floating dtype of x, so that float32 inputs are never upcast,
+	# while narrower float inputs (float16, ml_dtypes.bfloat16) are upcast to float32 along with every cache,
+	# on C-contiguous arrays so that every matmul goes straight to BLAS without a copy.
+	# The sequence is laid out time-major, (T_x, n, m), so that every time-step is one contiguous block.
+	dtype = np.result_type(x, np.float32)
+	x = np.asarray(x, dtype = dtype)
+	x_tm = np.ascontiguousarray(x.transpose(2, 0, 1))
+	a0 = np.ascontiguousarray(a0, dtype = dtype)
+	p = bind_rnn_parameters(cast_parameters(parameters, dtype))
+
+	# Retrieve dimensions from shapes of x and Wya
 	n_x, m, T_x = x.shape
-	n_y, n_a = parameters["Wya"].shape
-
-	# initialize "a" and "y" with zeros
-	a = np.zeros((n_a, m, T_x))
-	y_pred = np.zeros((n_y, m, T_x))
+	n_y, n_a = p.Wya.shape
 
 	# Initialize a_next
 	a_next = a0
 
+	# Project the inputs of all time-steps at once into "a": every time-step then turns its projection
+	# into its hidden state in place, so no separate buffer of hidden states is allocated
+	Waa = p.Waa
+	a = project_inputs(p.Wax, p.ba, x_tm)
+
+	# Buffer receiving the recurrent matmul of every time-step
+	rec = np.empty((n_a, m), dtype = dtype)
+
 	# loop over all time-steps
 	for t in range(T_x):
-		# Update next hidden state, compute the prediction, get the cache
-		a_next, yt_pred, cache = rnn_cell_forward(x[:,:,t], a_next, parameters)
-		# Save the value of the new "next" hidden state in a
-		a[:,:,t] = a_next
-		# Save the value of the prediction in y
-		y_pred[:,:,t] = yt_pred
-		# Append "cache" to "caches"
-		caches.append(cache)
+		# Update next hidden state in place in a, only the recurrent matmul is left in the loop
+		a_prev = a_next
+		a_next = a[t]
+		a_next += np.dot(Waa, a_prev, out = rec)
+		np.tanh(a_next, out = a_next)
+
+	# Compute the predictions of all time-steps at once
+	y_pred = project_outputs(a, p.Wya, p.by)
+
+	# store values needed for backward propagation in cache, as whole-sequence arrays rather than per time-step tuples
+	caches = (RNNCache(a = a, a0 = a0, x = x_tm, parameters = p), x)
+
+	return a.transpose(1, 2, 0), y_pred, caches
+
+
+def stack_lstm_gates(parameters):
+	"""
+	Stack the weights and biases of the four LSTM gates so that their pre-activations are computed with a single matmul.
+	The three sigmoid gates come first, so that they are activated with a single call on the first 3 * n_a rows.
+
+	Arguments:
+	parameters -- python dictionary containing Wf, bf, Wi, bi, Wc, bc, Wo, bo (see lstm_cell_forward),
+	              and W_all and b_all when packed by pack_lstm_parameters, which are then returned without a copy
+	              as long as the per-gate entries are still views into them
+
+	Returns:
+	W_all -- Stacked gate weights [Wf; Wi; Wo; Wc], numpy array of shape (4 * n_a, n_a + n_x)
+	b_all -- Stacked gate biases [bf; bi; bo; bc], numpy array of shape (4 * n_a, 1)
+	"""
+
+	# A gate re-bound to a new array (e.g. by a non in-place update) no longer shares memory with the packed block,
+	# which is then stale and stacked again
+	if "W_all" in parameters:
+		W_all, b_all = parameters["W_all"], parameters["b_all"]
+		if all(np.shares_memory(parameters["W" + gate], W_all) and np.shares_memory(parameters["b" + gate], b_all)
+		       for gate in ("f", "i", "o", "c")):
+			return W_all, b_all
+
+	W_all = np.vstack((parameters["Wf"], parameters["Wi"], parameters["Wo"], parameters["Wc"]))
+	b_all = np.vstack((parameters["bf"], parameters["bi"], parameters["bo"], parameters["bc"]))
+
+	return W_all, b_all
+
+
+def pack_lstm_parameters(parameters):
+	"""
+	Packs the gate weights and biases into one contiguous block each, so that stack_lstm_gates does not copy them
+	and the four gates are read from a single block of memory.
+
+	Arguments:
+	parameters -- python dictionary containing Wf, bf, Wi, bi, Wc, bc, Wo, bo and optionally Wy and by (see lstm_cell_forward)
+
+	Returns:
+	packed -- python dictionary containing the same parameters plus W_all and b_all (see stack_lstm_gates),
+	          where Wf, Wi, Wo, Wc and bf, bi, bo, bc are views into W_all and b_all (update them in place)
+	"""
+
+	W_all, b_all = stack_lstm_gates(parameters)
+	packed = dict(parameters, W_all = W_all, b_all = b_all)
+	Ws = np.split(W_all, 4, axis = 0)
+	bs = np.split(b_all, 4, axis = 0)
+	packed["Wf"], packed["Wi"], packed["Wo"], packed["Wc"] = Ws
+	packed["bf"], packed["bi"], packed["bo"], packed["bc"] = bs
+
+	return packed
 
-	# store values needed for backward propagation in cache
-	caches = (caches, x)
 
-	return a, y_pred, caches
+def bind_lstm_parameters(parameters):
+	"""
+	Binds the LSTM parameters once, so that the passes read them as attributes instead of dictionary lookups
 
+	Arguments:
+	parameters -- python dictionary containing Wf, bf, Wi, bi, Wc, bc, Wo, bo and optionally Wy and by (see lstm_cell_forward),
+	              or an LSTMParams
 
-def lstm_cell_forward(xt, a_prev, c_prev, parameters):
+	Returns:
+	p -- LSTMParams holding W_all, b_all (see stack_lstm_gates), Wy, by (None when not given) and the contiguous halves of W_all
+	     Wh_all -- applied to a_prev, of shape (4 * n_a, n_a), and Wx_all -- applied to xt, of shape (4 * n_a, n_x)
+	"""
+
+	if isinstance(parameters, LSTMParams):
+		return parameters
+
+	W_all, b_all = stack_lstm_gates(parameters)
+	n_a = W_all.shape[0] // 4
+	Wh_all = np.ascontiguousarray(W_all[:, : n_a])
+	Wx_all = np.ascontiguousarray(W_all[:, n_a :])
+
+	return LSTMParams(W_all, b_all, Wh_all, Wx_all, parameters.get("Wy"), parameters.get("by"))
+
+
+def lstm_cell_step(z, c_prev, a_next = None, c_next = None, tanh_c_next = None):
+	"""
+	Applies the LSTM gates to their pre-activations z = W_all [a_prev; xt] + b_all (see stack_lstm_gates).
+	The activations are computed in place, so ft, it, cct and ot are views into z.
+
+	Arguments:
+	z -- Pre-activations of the forget, update, output and candidate gates, numpy array of shape (4 * n_a, m)
+	c_prev -- Memory state at timestep "t-1", numpy array of shape (n_a, m)
+	a_next, c_next, tanh_c_next -- (optional) arrays of shape (n_a, m) the results are written into
+
+	Returns:
+	a_next -- next hidden state, of shape (n_a, m)
+	c_next -- next memory state, of shape (n_a, m)
+	ft, it, cct, ot -- forget gate, update gate, candidate value and output gate, of shape (n_a, m)
+	tanh_c_next -- tanh(c_next), kept for the backward pass, of shape (n_a, m)
+	"""
+
+	n_a = z.shape[0] // 4
+	sigmoid(z[: 3 * n_a], out = z[: 3 * n_a])
+	np.tanh(z[3 * n_a :], out = z[3 * n_a :])
+	ft, it, ot, cct = np.split(z, 4, axis = 0)
+	c_next = np.multiply(ft, c_prev, out = c_next)
+	c_next += it * cct
+	tanh_c_next = np.tanh(c_next, out = tanh_c_next)
+	a_next = np.multiply(ot, tanh_c_next, out = a_next)
+
+	return a_next, c_next, ft, it, cct, ot, tanh_c_next
+
+
+def lstm_cell_forward(xt, a_prev, c_prev, parameters, concat = None):
 	"""
 	Implement a single forward step of the LSTM-cell as described in Figure (4)
 
@@ -106,53 +396,46 @@ def lstm_cell_forward(xt, a_prev, c_prev, parameters):
 	                    bc --  Bias of the first "tanh", numpy array of shape (n_a, 1)
 	                    Wo -- Weight matrix of the output gate, numpy array of shape (n_a, n_a + n_x)
 	                    bo --  Bias of the output gate, numpy array of shape (n_a, 1)
-	                    Wy -- Weight matrix relating the hidden-state to the output, numpy array of shape (n_y, n_a)
-	                    by -- Bias relating the hidden-state to the output, numpy array of shape (n_y, 1)
+	                    Wy -- (optional) Weight matrix relating the hidden-state to the output, numpy array of shape (n_y, n_a)
+	                    by -- (optional) Bias relating the hidden-state to the output, numpy array of shape (n_y, 1)
+	              or the LSTMParams returned by bind_lstm_parameters(parameters), to skip stacking the gates at every call
+	concat -- (optional) scratch buffer of shape (n_a + n_x, m) that receives [a_prev; xt]
 	                    
 	Returns:
 	a_next -- next hidden state, of shape (n_a, m)
 	c_next -- next memory state, of shape (n_a, m)
-	yt_pred -- prediction at timestep "t", numpy array of shape (n_y, m)
-	cache -- tuple of values needed for the backward pass, contains (a_next, c_next, a_prev, c_prev, xt, parameters)
+	yt_pred -- prediction at timestep "t", numpy array of shape (n_y, m), or None when Wy and by are not given
+	cache -- tuple of values needed for the backward pass, contains (a_next, c_next, a_prev, c_prev, ft, it, cct, ot, xt, parameters, tanh_c_next)
 
 	Note: ft/it/ot stand for the forget/update/output gates, cct stands for the candidate value (c tilde),
 	      c stands for the memory value
 	"""
 
 	# Retrieve parameters from "parameters"
-	Wf = parameters["Wf"]
-	bf = parameters["bf"]
-	Wi = parameters["Wi"]
-	bi = parameters["bi"]
-	Wc = parameters["Wc"]
-	bc = parameters["bc"]
-	Wo = parameters["Wo"]
-	bo = parameters["bo"]
-	Wy = parameters["Wy"]
-	by = parameters["by"]
-
-	# Retrieve dimensions from shapes of xt and Wy
+	p = bind_lstm_parameters(parameters)
+
+	# Retrieve dimensions from shapes of xt and the recurrent gate weights
 	n_x, m = xt.shape
-	n_y, n_a = Wy.shape
+	n_a = p.Wh_all.shape[1]
 
 	# Concatenate a_prev and xt
-	concat = np.zeros((n_a + n_x, m))
+	if concat is None:
+		concat = np.empty((n_a + n_x, m), dtype = np.result_type(a_prev, xt))
 	concat[: n_a, :] = a_prev
 	concat[n_a :, :] = xt
 
+	# Compute the pre-activations of all four gates with one matmul
+	z = np.matmul(p.W_all, concat)
+	z += p.b_all
+
 	# Compute values for ft, it, cct, c_next, ot, a_next using the formulas given figure (4)
-	ft = sigmoid(np.matmul(Wf, concat) + bf)
-	it = sigmoid(np.matmul(Wi, concat) + bi)
-	cct = np.tanh(np.matmul(Wc, concat) + bc)
-	c_next = ft * c_prev + it * cct
-	ot = sigmoid(np.matmul(Wo, concat) + bo)
-	a_next = ot * np.tanh(c_next)
+	a_next, c_next, ft, it, cct, ot, tanh_c_next = lstm_cell_step(z, c_prev)
 
-	# Compute prediction of the LSTM cell
-	yt_pred = softmax(np.matmul(Wy, a_next) + by)
+	# Compute prediction of the LSTM cell, when the parameters include the output layer
+	yt_pred = softmax(np.matmul(p.Wy, a_next) + p.by) if p.Wy is not None else None
 
 	# store values needed for backward propagation in cache
-	cache = (a_next, c_next, a_prev, c_prev, ft, it, cct, ot, xt, parameters)
+	cache = (a_next, c_next, a_prev, c_prev, ft, it, cct, ot, xt, parameters, tanh_c_next)
 
 	return a_next, c_next, yt_pred, cache
 
@@ -173,49 +456,91 @@ def lstm_forward(x, a0, parameters):
 					    bc -- Bias of the first "tanh", numpy array of shape (n_a, 1)
 					    Wo -- Weight matrix of the output gate, numpy array of shape (n_a, n_a + n_x)
 					    bo -- Bias of the output gate, numpy array of shape (n_a, 1)
-					    Wy -- Weight matrix relating the hidden-state to the output, numpy array of shape (n_y, n_a)
-					    by -- Bias relating the hidden-state to the output, numpy array of shape (n_y, 1)
+					    Wy -- (optional) Weight matrix relating the hidden-state to the output, numpy array of shape (n_y, n_a)
+					    by -- (optional) Bias relating the hidden-state to the output, numpy array of shape (n_y, 1)
+	              or the LSTMParams returned by bind_lstm_parameters(parameters)
 	                    
 	Returns:
 	a -- Hidden states for every time-step, numpy array of shape (n_a, m, T_x)
-	y -- Predictions for every time-step, numpy array of shape (n_y, m, T_x)
-	caches -- tuple of values needed for the backward pass, contains (list of all the caches, x)
-	"""
+	y -- Predictions for every time-step, numpy array of shape (n_y, m, T_x), or None when Wy and by are not given
+	c -- Memory states for every time-step, numpy array of shape (n_a, m, T_x)
+	caches -- tuple of values needed for the backward pass, contains (LSTMCache, x)
 
-	# Initialize "caches", which will track the list of all the caches
-	caches = []
+	Note: a and c are views of the states stored in caches, which lstm_backward reads; copy them before modifying them in place
+	"""
 
 	### START CODE HERE ###
-	# Retrieve dimensions from shapes of x and parameters['Wy']
+	# Run the whole sequence in the floating dtype of x, so that float32 inputs are never upcast,
+	# while narrower float inputs (float16, ml_dtypes.bfloat16) are upcast to float32 along with every cache,
+	# on C-contiguous arrays so that every matmul goes straight to BLAS without a copy.
+	# The sequence is laid out time-major, (T_x, n, m), so that every time-step is one contiguous block.
+	dtype = np.result_type(x, np.float32)
+	x = np.asarray(x, dtype = dtype)
+	x_tm = np.ascontiguousarray(x.transpose(2, 0, 1))
+	a0 = np.ascontiguousarray(a0, dtype = dtype)
+	p = bind_lstm_parameters(cast_parameters(parameters, dtype))
+
+	# Retrieve dimensions from shapes of x and the recurrent gate weights
 	n_x, m, T_x = x.shape
-	n_y, n_a = parameters['Wy'].shape
+	n_a = p.Wh_all.shape[1]
 
-	# initialize "a", "c" and "y" with zeros
-	a = np.zeros((n_a, m, T_x))
-	c = np.zeros((n_a, m, T_x))
-	y = np.zeros((n_y, m, T_x))
+	# initialize "a", "c" and tanh(c), every time-step writes its states straight into their contiguous block
+	a = np.empty((T_x, n_a, m), dtype = dtype)
+	c = np.empty((T_x, n_a, m), dtype = dtype)
+	tanh_c = np.empty((T_x, n_a, m), dtype = dtype)
 
 	# Initialize a_next and c_next
 	a_next = a0
-	c_next = np.zeros(a_next.shape)
+	c0 = np.zeros(a_next.shape, dtype = dtype)
+	c_next = c0
+
+	# Keep the recurrent half of the stacked gate weights for the loop
+	# and project the inputs of all time-steps at once with their input half.
+	# The gates are then activated in place in that buffer, which is kept for the backward pass.
+	Wh_all = p.Wh_all
+	gates = project_inputs(p.Wx_all, p.b_all, x_tm)
+
+	# Buffer receiving the recurrent matmul of every time-step
+	rec = np.empty((4 * n_a, m), dtype = dtype)
 
 	# loop over all time-steps
 	for t in range(T_x):
-		# Update next hidden state, next memory state, compute the prediction, get the cache
-		a_next, c_next, yt, cache = lstm_cell_forward(x[:,:,t], a_next, c_next, parameters)
-		# Save the value of the new "next" hidden state in a
-		a[:,:,t] = a_next
-		# Save the value of the prediction in y
-		y[:,:,t] = yt
-		# Save the value of the next cell state
-		c[:,:,t]  = c_next
-		# Append the cache into caches
-		caches.append(cache)
+		# Update next hidden state and next memory state, only the recurrent matmul is left in the loop
+		z = gates[t]
+		z += np.dot(Wh_all, a_next, out = rec)
+		a_next, c_next, ft, it, cct, ot, tanh_c_next = lstm_cell_step(z, c_next, a[t], c[t], tanh_c[t])
 
-	# store values needed for backward propagation in cache
-	caches = (caches, x)
+	# Compute the predictions of all time-steps at once, when the parameters include the output layer
+	y = project_outputs(a, p.Wy, p.by) if p.Wy is not None else None
+
+	# store values needed for backward propagation in cache, as whole-sequence arrays rather than per time-step tuples
+	caches = (LSTMCache(a = a, c = c, gates = gates, tanh_c = tanh_c, a0 = a0, c0 = c0, x = x_tm, parameters = p), x)
 
-	return a, y, c, caches
+	return a.transpose(1, 2, 0), y, c.transpose(1, 2, 0), caches
+
+
+def stack_inputs(a0, a, x):
+	"""
+	Stacks the inputs [a<t-1>; x<t>] of every time-step, so that the weight gradients of the whole
+	sequence are computed with a single tensordot against them.
+
+	Arguments:
+	a0 -- Initial hidden state, of shape (n_a, m)
+	a -- Hidden states for every time-step, time-major, numpy array of shape (T_x, n_a, m)
+	x -- Input data for every time-step, time-major, of shape (T_x, n_x, m)
+
+	Returns:
+	concat -- [a_prev; x] of every time-step, time-major, numpy array of shape (T_x, n_a + n_x, m)
+	"""
+
+	T_x, n_a, m = a.shape
+	n_x = x.shape[1]
+	concat = np.empty((T_x, n_a + n_x, m), dtype = a.dtype)
+	concat[0, : n_a] = a0
+	concat[1 :, : n_a] = a[: -1]
+	concat[:, n_a :] = x
+
+	return concat
 
 
 def rnn_cell_backward(da_next, cache):
@@ -239,14 +564,11 @@ def rnn_cell_backward(da_next, cache):
 	(a_next, a_prev, xt, parameters) = cache
 
 	# Retrieve values from parameters
-	Wax = parameters["Wax"]
-	Waa = parameters["Waa"]
-	Wya = parameters["Wya"]
-	ba = parameters["ba"]
-	by = parameters["by"]
+	p = bind_rnn_parameters(parameters)
+	Wax, Waa = p.Wax, p.Waa
 
 	# compute the gradient of tanh with respect to a_next
-	dtanh = (1 - a_next ** 2) * da_next
+	dtanh = tanh_backward(a_next, da_next)
 
 	# compute the gradient of the loss with respect to Wax
 	dxt = np.dot(Wax.T, dtanh)
@@ -257,7 +579,7 @@ def rnn_cell_backward(da_next, cache):
 	dWaa = np.dot(dtanh, a_prev.T)
 
 	# compute the gradient with respect to b
-	dba = np.sum(dtanh, axis = 1, keepdims = 1)
+	dba = np.sum(dtanh, axis = 1, keepdims = True)
 
 	# Store the gradients in a python dictionary
 	gradients = {"dxt": dxt, "da_prev": da_prev, "dWax": dWax, "dWaa": dWaa, "dba": dba}
@@ -269,12 +591,15 @@ def rnn_backward(da, caches):
 	"""
 	Implement the backward pass for a RNN over an entire sequence of input data.
 
+	Only da_prev depends on the next time-step, so the loop computes the gradients of tanh and da_prev,
+	and the gradients w.r.t. the input and the parameters are then computed for all time-steps at once.
+
 	Arguments:
 	da -- Upstream gradients of all hidden states, of shape (n_a, m, T_x)
 	caches -- tuple containing information from the forward pass (rnn_forward)
 
 	Returns:
-	gradients -- python dictionary containing:
+	gradients -- RNNGradients containing:
 					    dx -- Gradient w.r.t. the input data, numpy-array of shape (n_x, m, T_x)
 					    da0 -- Gradient w.r.t the initial hidden state, numpy-array of shape (n_a, m)
 					    dWax -- Gradient w.r.t the input's weight matrix, numpy-array of shape (n_a, n_x)
@@ -284,43 +609,97 @@ def rnn_backward(da, caches):
 	    
 	### START CODE HERE ###
 
-	# Retrieve values from the first cache (t=1) of caches
-	(caches, x) = caches
-	(a1, a0, x1, parameters) = caches[0]
+	# Retrieve values from caches
+	(cache, x) = caches
+	a, a0, x, p = cache.a, cache.a0, cache.x, cache.parameters
+	Wax, Waa = p.Wax, p.Waa
 
-	# Retrieve dimensions from da's and x1's shapes
+	# Retrieve dimensions from da's and x's shapes
 	n_a, m, T_x = da.shape
-	n_x, m = x1.shape
+	n_x = x.shape[1]
+	assert T_x == x.shape[0], "da has %d time-steps, the forward pass ran %d" % (T_x, x.shape[0])
+
+	# Accumulate the gradients in the dtype the forward pass ran in, reading da time-major like the caches
+	dtype = x.dtype
+	da = np.asarray(da, dtype = dtype).transpose(2, 0, 1)
 
-	# initialize the gradients with the right sizes
-	dx = np.zeros((n_x, m, T_x))
-	dWax = np.zeros((n_a, n_x))
-	dWaa = np.zeros((n_a, n_a))
-	dba = np.zeros((n_a, 1))
-	da0 = np.zeros((n_a, m))
-	da_prevt = np.zeros((n_a, m))
+	# initialize the gradient of tanh of every time-step and the one flowing back through the hidden state
+	dtanh = np.empty((T_x, n_a, m), dtype = dtype)
+	da_prevt = np.zeros((n_a, m), dtype = dtype)
 
 	# Loop through all the time steps
 	for t in reversed(range(T_x)):
-		# Compute gradients at time step t. Choose wisely the "da_next" and the "cache" to use in the backward propagation step.
-		gradients = rnn_cell_backward(da[:,:,t] + da_prevt, caches[t])
-		# Retrieve derivatives from gradients
-		dxt, da_prevt, dWaxt, dWaat, dbat = gradients["dxt"], gradients["da_prev"], gradients["dWax"], gradients["dWaa"], gradients["dba"]
-		# Increment global derivatives w.r.t parameters by adding their derivative at time-step t
-		dx[:, :, t] = dxt
-		dWax += dWaxt
-		dWaa += dWaat
-		dba += dbat
+		# Compute the gradient of tanh at time step t. Choose wisely the "da_next" to use in the backward propagation step.
+		tanh_backward(a[t], da[t] + da_prevt, out = dtanh[t])
+		np.dot(Waa.T, dtanh[t], out = da_prevt)
 	    
 	# Set da0 to the gradient of a which has been backpropagated through all time-steps
 	da0 = da_prevt
 
-	# Store the gradients in a python dictionary
-	gradients = {"dx": dx, "da0": da0, "dWax": dWax, "dWaa": dWaa,"dba": dba}
+	# Compute the gradients w.r.t. the inputs and the parameters of all time-steps with one product each
+	dx = np.matmul(Wax.T, dtanh).transpose(1, 2, 0)
+	dWa = np.tensordot(dtanh, stack_inputs(a0, a, x), axes = ([0, 2], [0, 2]))
+	dWaa, dWax = dWa[:, : n_a], dWa[:, n_a :]
+	dba = np.sum(dtanh, axis = (0, 2)).reshape(n_a, 1)
+
+	# Store the gradients
+	gradients = RNNGradients(dx = dx, da0 = da0, dWax = dWax, dWaa = dWaa, dba = dba)
 
 	return gradients
 
 
+def lstm_cell_backward_gates(da_next, dc_next, c_prev, ft, it, cct, ot, tanh_c_next, dZ):
+	"""
+	Computes the gradients of the gate pre-activations of a single LSTM time-step (equations (7) to (10)).
+	Each one is written straight into its rows of dZ, without intermediate arrays.
+
+	Arguments:
+	da_next -- Gradients of next hidden state, of shape (n_a, m)
+	dc_next -- Gradients of next cell state, of shape (n_a, m)
+	c_prev -- Memory state at timestep "t-1", of shape (n_a, m)
+	ft, it, cct, ot, tanh_c_next -- Gates, candidate value and tanh(c_next) of the time-step, stored by the forward pass
+	dZ -- Output array of shape (4 * n_a, m) receiving [dft; dit; dot; dcct], stacked like stack_lstm_gates
+
+	Returns:
+	dc_prev -- Gradient w.r.t. the previous memory state, of shape (n_a, m)
+	"""
+
+	dft, dit, dot, dcct = np.split(dZ, 4, axis = 0)
+
+	# Gradient reaching the memory state, shared by dcct, dit, dft and dc_prev:
+	# dc = dc_next + da_next * ot * (1 - tanh(c_next)^2)
+	dc = tanh_backward(tanh_c_next, da_next)
+	dc *= ot
+	dc += dc_next
+
+	# dot = da_next * tanh(c_next) * ot * (1 - ot)
+	np.subtract(1, ot, out = dot)
+	dot *= ot
+	dot *= tanh_c_next
+	dot *= da_next
+
+	# dcct = dc * it * (1 - cct^2)
+	tanh_backward(cct, dc, out = dcct)
+	dcct *= it
+
+	# dit = dc * cct * it * (1 - it)
+	np.subtract(1, it, out = dit)
+	dit *= it
+	dit *= cct
+	dit *= dc
+
+	# dft = dc * c_prev * ft * (1 - ft)
+	np.subtract(1, ft, out = dft)
+	dft *= ft
+	dft *= c_prev
+	dft *= dc
+
+	# dc_prev = dc * ft
+	dc *= ft
+
+	return dc
+
+
 def lstm_cell_backward(da_next, dc_next, cache):
 	"""
 	Implement the backward pass for the LSTM-cell (single time-step).
@@ -346,7 +725,7 @@ def lstm_cell_backward(da_next, dc_next, cache):
 	"""
 
 	# Retrieve information from "cache"
-	(a_next, c_next, a_prev, c_prev, ft, it, cct, ot, xt, parameters) = cache
+	(a_next, c_next, a_prev, c_prev, ft, it, cct, ot, xt, parameters, tanh_c_next) = cache
 
 	### START CODE HERE ###
 	# Retrieve dimensions from xt's and a_next's shape (≈2 lines)
@@ -354,52 +733,23 @@ def lstm_cell_backward(da_next, dc_next, cache):
 	n_a, m = a_next.shape
 
 	# Compute gates related derivatives, you can find their values can be found by looking carefully at equations (7) to (10) (≈4 lines)
-	dot = da_next * np.tanh(c_next) * ot * (1 - ot)
-	dcct = (dc_next * it + ot * (1 - np.square(np.tanh(c_next))) * it * da_next) * (1 - np.square(cct))
-	dit = (dc_next + da_next * ot * (1 - np.square(np.tanh(c_next)))) * cct * it * (1 - it)
-	dft = (dc_next + da_next * ot * (1 - np.square(np.tanh(c_next)))) * c_prev * ft * (1 - ft)
+	dZ = np.empty((4 * n_a, m), dtype = a_next.dtype)
+	dc_prev = lstm_cell_backward_gates(da_next, dc_next, c_prev, ft, it, cct, ot, tanh_c_next, dZ)
 
 	# Concatenate a_prev and xt
 	concat = np.concatenate((a_prev, xt), axis = 0)
 
-	# Compute parameters related derivatives. Use equations (11)-(14) (≈8 lines)
-	dWf = np.dot(dft, concat.T)
-	dWi = np.dot(dit, concat.T)
-	dWc = np.dot(dcct, concat.T)
-	dWo = np.dot(dot, concat.T)
-	dbf = np.sum(dft, axis = 1, keepdims = True)
-	dbi = np.sum(dit, axis = 1, keepdims = True)
-	dbc = np.sum(dcct, axis = 1, keepdims = True)
-	dbo = np.sum(dot, axis = 1, keepdims = True)
-
-	# Call the parameters
-	Wf = parameters["Wf"]
-	Wi = parameters["Wi"]
-	Wo = parameters["Wo"]
-	Wc = parameters["Wc"]
-	Wy = parameters["Wy"]
-	bf = parameters["bf"]
-	bi = parameters["bi"]
-	bo = parameters["bo"]
-	bc = parameters["bc"]
-	by = parameters["by"]
-
-	# Compute derivatives w.r.t previous hidden state, previous memory state and input. Use equations (15)-(17). (≈3 lines)
-	da_prev = np.dot(Wf[:, :n_a].T, dft) + np.dot(Wi[:, :n_a].T, dit) + np.dot(Wc[:, :n_a].T, dcct) + np.dot(Wo[:, :n_a].T, dot)
-	dc_prev = (dc_next + da_next * ot * (1 - np.square(np.tanh(c_next)))) * ft 
-	dxt = np.dot(Wf[:, n_a:].T, dft) + np.dot(Wi[:, n_a:].T, dit) + np.dot(Wc[:, n_a:].T, dcct) + np.dot(Wo[:, n_a:].T, dot)
-
-	"""
-	da_prev = np.dot(parameters["Wf"][:, :n_a].T, dft) + ...
-				np.dot(parameters["Wi"][:, :n_a].T, dit) + ...
-				np.dot(parameters["Wc"][:, :n_a].T, dcct) + ...
-				np.dot(parameters["Wo"][:, :n_a].T, dot)
-	dc_prev = (dc_next + da_next * ot * (1 - np.square(np.tanh(c_next)))) * ft
-	dxt = np.dot(parameters["Wf"][:, n_a:].T, dft) + ...
-			np.dot(parameters["Wi"][:, n_a:].T, dit) + ...
-			np.dot(parameters["Wc"][:, n_a:].T, dcct) + ...
-			np.dot(parameters["Wo"][:, n_a:].T, dot)
-	"""
+	# Compute parameters related derivatives of all four gates with one matmul. Use equations (11)-(14)
+	dW_all = np.dot(dZ, concat.T)
+	db_all = np.sum(dZ, axis = 1, keepdims = True)
+	dWf, dWi, dWo, dWc = np.split(dW_all, 4, axis = 0)
+	dbf, dbi, dbo, dbc = np.split(db_all, 4, axis = 0)
+
+	# Compute derivatives w.r.t previous hidden state and input with one matmul. Use equations (15)-(17)
+	p = bind_lstm_parameters(parameters)
+	dconcat = np.dot(p.W_all.T, dZ)
+	da_prev = dconcat[: n_a, :]
+	dxt = dconcat[n_a :, :]
 
 	# Save gradients in dictionary
 	gradients = {"dxt": dxt, "da_prev": da_prev, "dc_prev": dc_prev, "dWf": dWf,"dbf": dbf, "dWi": dWi,"dbi": dbi,
@@ -412,12 +762,15 @@ def lstm_backward(da, caches):
 	"""
 	Implement the backward pass for the RNN with LSTM-cell (over a whole sequence).
 
+	Only da_prev and dc_prev depend on the next time-step, so the loop computes the gate gradients and da_prev,
+	and the gradients w.r.t. the input and the parameters are then computed for all time-steps at once.
+
 	Arguments:
 	da -- Gradients w.r.t the hidden states, numpy-array of shape (n_a, m, T_x)
 	caches -- cache storing information from the forward pass (lstm_forward)
 
 	Returns:
-	gradients -- python dictionary containing:
+	gradients -- LSTMGradients containing:
 					    dx -- Gradient of inputs, of shape (n_x, m, T_x)
 					    da0 -- Gradient w.r.t. the previous hidden state, numpy array of shape (n_a, m)
 					    dWf -- Gradient w.r.t. the weight matrix of the forget gate, numpy array of shape (n_a, n_a + n_x)
@@ -430,54 +783,72 @@ def lstm_backward(da, caches):
 					    dbo -- Gradient w.r.t. biases of the save gate, of shape (n_a, 1)
 	"""
 
-	# Retrieve values from the first cache (t=1) of caches.
-	(caches, x) = caches
-	(a1, c1, a0, c0, f1, i1, cc1, o1, x1, parameters) = caches[0]
+	# Retrieve values from caches
+	(cache, x) = caches
+	a, c, gates, tanh_c = cache.a, cache.c, cache.gates, cache.tanh_c
+	a0, c0, x, p = cache.a0, cache.c0, cache.x, cache.parameters
 
-	# Retrieve dimensions from da's and x1's shapes
+	# Retrieve dimensions from da's and x's shapes
 	n_a, m, T_x = da.shape
-	n_x, m = x1.shape
-
-	# initialize the gradients with the right sizes
-	dx = np.zeros((n_x, m, T_x))
-	da0 = np.zeros((n_a, m))
-	da_prevt = np.zeros(da0.shape)
-	dc_prevt = np.zeros(da0.shape)
-	dWf = np.zeros((n_a, n_a + n_x))
-	dWi = np.zeros(dWf.shape)
-	dWc = np.zeros(dWf.shape)
-	dWo = np.zeros(dWf.shape)
-	dbf = np.zeros((n_a, 1))
-	dbi = np.zeros(dbf.shape)
-	dbc = np.zeros(dbf.shape)
-	dbo = np.zeros(dbf.shape)
+	n_x = x.shape[1]
+	assert T_x == x.shape[0], "da has %d time-steps, the forward pass ran %d" % (T_x, x.shape[0])
+
+	# Accumulate the gradients in the dtype the forward pass ran in, reading da time-major like the caches
+	dtype = x.dtype
+	da = np.asarray(da, dtype = dtype).transpose(2, 0, 1)
+
+	# initialize the gate gradients of every time-step, stacked like stack_lstm_gates
+	dZ = np.empty((T_x, 4 * n_a, m), dtype = dtype)
+	da_prevt = np.zeros((n_a, m), dtype = dtype)
+	dc_prevt = np.zeros((n_a, m), dtype = dtype)
+
+	# Transpose the recurrent and input halves of the gate weights bound by the forward pass
+	# into C-contiguous arrays, so that the matmuls below neither slice nor copy them again
+	Wh_all_T = np.ascontiguousarray(p.Wh_all.T)
+	Wx_all_T = np.ascontiguousarray(p.Wx_all.T)
 
 	# loop back over the whole sequence
 	for t in reversed(range(T_x)):
-		# Compute all gradients using lstm_cell_backward
-		gradients = lstm_cell_backward(da[:, :, t], dc_prevt, caches[t])
-
-		# Store or add the gradient to the parameters' previous step's gradient
-		dx[:,:,t] = gradients["dxt"]
-		dWf += gradients["dWf"]
-		dWi += gradients["dWi"]
-		dWc += gradients["dWc"]
-		dWo += gradients["dWo"]
-		dbf += gradients["dbf"]
-		dbi += gradients["dbi"]
-		dbc += gradients["dbc"]
-		dbo += gradients["dbo"]
+		# Slice the values of the time-step out of the caches
+		c_prev = c[t - 1] if t > 0 else c0
+		ft, it, ot, cct = np.split(gates[t], 4, axis = 0)
+		# Compute the gate gradients of the time-step into dZ, with the gradients flowing back from the next time-step,
+		# and the gradients w.r.t. the previous hidden and memory states
+		dc_prevt = lstm_cell_backward_gates(da[t] + da_prevt, dc_prevt, c_prev, ft, it, cct, ot, tanh_c[t], dZ[t])
+		np.dot(Wh_all_T, dZ[t], out = da_prevt)
 
 	# Set the first activation's gradient to the backpropagated gradient da_prev.
-	da0 = gradients["da_prev"]
+	da0 = da_prevt
 
-	# Store the gradients in a python dictionary
-	gradients = {"dx": dx, "da0": da0, "dWf": dWf,"dbf": dbf, "dWi": dWi,"dbi": dbi,
-	            "dWc": dWc,"dbc": dbc, "dWo": dWo,"dbo": dbo}
+	# Compute the gradients w.r.t. the inputs and the parameters of all time-steps with one product each
+	dx = np.matmul(Wx_all_T, dZ).transpose(1, 2, 0)
+	dW_all = np.tensordot(dZ, stack_inputs(a0, a, x), axes = ([0, 2], [0, 2]))
+	db_all = np.sum(dZ, axis = (0, 2)).reshape(4 * n_a, 1)
+
+	# Split the stacked gradients per gate
+	dWf, dWi, dWo, dWc = np.split(dW_all, 4, axis = 0)
+	dbf, dbi, dbo, dbc = np.split(db_all, 4, axis = 0)
+
+	# Store the gradients
+	gradients = LSTMGradients(dx = dx, da0 = da0, dWf = dWf, dbf = dbf, dWi = dWi, dbi = dbi,
+	                          dWc = dWc, dbc = dbc, dWo = dWo, dbo = dbo)
 
 	return gradients
 
 
+# Set while benchmark_checks runs, so that the checks only run their computations
+QUIET = False
+
+
+def report(*values):
+	"""
+	Prints the values like print, unless the checks are being benchmarked, in which case they are not even formatted
+	"""
+
+	if not QUIET:
+		print(*values)
+
+
 def check_rnn_forward():
 	### rnn_cell_forward
 	"""
@@ -488,7 +859,7 @@ def check_rnn_forward():
 					0.88945212	0.36920224	0.9966312	0.9982559	0.17746526]
 	yt_pred.shape =  (2, 10)
 	"""
-	print("\n\n##### [ rnn_cell_forward ] #####\n")
+	report("\n\n##### [ rnn_cell_forward ] #####\n")
 
 	np.random.seed(1)
 	xt = np.random.randn(3,10)
@@ -501,10 +872,10 @@ def check_rnn_forward():
 	parameters = {"Waa": Waa, "Wax": Wax, "Wya": Wya, "ba": ba, "by": by}
 
 	a_next, yt_pred, cache = rnn_cell_forward(xt, a_prev, parameters)
-	print("a_next[4] = ", a_next[4])
-	print("a_next.shape = ", a_next.shape)
-	print("yt_pred[1] =", yt_pred[1])
-	print("yt_pred.shape = ", yt_pred.shape)
+	report("a_next[4] = ", a_next[4])
+	report("a_next.shape = ", a_next.shape)
+	report("yt_pred[1] =", yt_pred[1])
+	report("yt_pred.shape = ", yt_pred.shape)
 
 	### rnn_forward
 	"""
@@ -515,7 +886,7 @@ def check_rnn_forward():
 	caches[1][1][3] = [-1.1425182  -0.34934272 -0.20889423  0.58662319]
 	len(caches) =  2
 	"""
-	print("\n\n##### [ rnn_forward ] #####\n")
+	report("\n\n##### [ rnn_forward ] #####\n")
 
 	np.random.seed(1)
 	x = np.random.randn(3,10,4)
@@ -528,12 +899,12 @@ def check_rnn_forward():
 	parameters = {"Waa": Waa, "Wax": Wax, "Wya": Wya, "ba": ba, "by": by}
 
 	a, y_pred, caches = rnn_forward(x, a0, parameters)
-	print("a[4][1] = ", a[4][1])
-	print("a.shape = ", a.shape)
-	print("y_pred[1][3] =", y_pred[1][3])
-	print("y_pred.shape = ", y_pred.shape)
-	print("caches[1][1][3] =", caches[1][1][3])
-	print("len(caches) = ", len(caches))
+	report("a[4][1] = ", a[4][1])
+	report("a.shape = ", a.shape)
+	report("y_pred[1][3] =", y_pred[1][3])
+	report("y_pred.shape = ", y_pred.shape)
+	report("caches[1][1][3] =", caches[1][1][3])
+	report("len(caches) = ", len(caches))
 
 def check_lstm_forward():
 	### lstm_cell_forward
@@ -549,9 +920,9 @@ def check_lstm_forward():
 	yt.shape =  (2, 10)
 	cache[1][3] = [-0.16263996  1.03729328  0.72938082 -0.54101719  0.02752074
 					-0.30821874	0.07651101 -1.03752894  1.41219977 -0.37647422]
-	len(cache) =  10
+	len(cache) =  11
 	"""
-	print("\n\n##### [ lstm_cell_forward ] #####\n")
+	report("\n\n##### [ lstm_cell_forward ] #####\n")
 
 	np.random.seed(1)
 	xt = np.random.randn(3,10)
@@ -568,17 +939,17 @@ def check_lstm_forward():
 	Wy = np.random.randn(2,5)
 	by = np.random.randn(2,1)
 
-	parameters = {"Wf": Wf, "Wi": Wi, "Wo": Wo, "Wc": Wc, "Wy": Wy, "bf": bf, "bi": bi, "bo": bo, "bc": bc, "by": by}
+	parameters = pack_lstm_parameters({"Wf": Wf, "Wi": Wi, "Wo": Wo, "Wc": Wc, "Wy": Wy, "bf": bf, "bi": bi, "bo": bo, "bc": bc, "by": by})
 
 	a_next, c_next, yt, cache = lstm_cell_forward(xt, a_prev, c_prev, parameters)
-	print("a_next[4] = ", a_next[4])
-	print("a_next.shape = ", c_next.shape)
-	print("c_next[2] = ", c_next[2])
-	print("c_next.shape = ", c_next.shape)
-	print("yt[1] =", yt[1])
-	print("yt.shape = ", yt.shape)
-	print("cache[1][3] =", cache[1][3])
-	print("len(cache) = ", len(cache))
+	report("a_next[4] = ", a_next[4])
+	report("a_next.shape = ", c_next.shape)
+	report("c_next[2] = ", c_next[2])
+	report("c_next.shape = ", c_next.shape)
+	report("yt[1] =", yt[1])
+	report("yt.shape = ", yt.shape)
+	report("cache[1][3] =", cache[1][3])
+	report("len(cache) = ", len(cache))
 
 	### lstm_forward
 	"""
@@ -591,7 +962,7 @@ def check_lstm_forward():
 	c[1][2][1] -0.855544916718
 	len(caches) =  2
 	"""
-	print("\n\n##### [ lstm_forward ] #####\n")
+	report("\n\n##### [ lstm_forward ] #####\n")
 
 	np.random.seed(1)
 	x = np.random.randn(3,10,7)
@@ -607,16 +978,16 @@ def check_lstm_forward():
 	Wy = np.random.randn(2,5)
 	by = np.random.randn(2,1)
 
-	parameters = {"Wf": Wf, "Wi": Wi, "Wo": Wo, "Wc": Wc, "Wy": Wy, "bf": bf, "bi": bi, "bo": bo, "bc": bc, "by": by}
+	parameters = pack_lstm_parameters({"Wf": Wf, "Wi": Wi, "Wo": Wo, "Wc": Wc, "Wy": Wy, "bf": bf, "bi": bi, "bo": bo, "bc": bc, "by": by})
 
 	a, y, c, caches = lstm_forward(x, a0, parameters)
-	print("a[4][3][6] = ", a[4][3][6])
-	print("a.shape = ", a.shape)
-	print("y[1][4][3] =", y[1][4][3])
-	print("y.shape = ", y.shape)
-	print("caches[1][1[1]] =", caches[1][1][1])
-	print("c[1][2][1]", c[1][2][1])
-	print("len(caches) = ", len(caches))
+	report("a[4][3][6] = ", a[4][3][6])
+	report("a.shape = ", a.shape)
+	report("y[1][4][3] =", y[1][4][3])
+	report("y.shape = ", y.shape)
+	report("caches[1][1[1]] =", caches[1][1][1])
+	report("c[1][2][1]", c[1][2][1])
+	report("len(caches) = ", len(caches))
 
 def check_rnn_backward():
 	### rnn_cell_backward
@@ -632,7 +1003,7 @@ def check_rnn_backward():
 	gradients["dba"][4] = [ 0.80517166]
 	gradients["dba"].shape = (5, 1)
 	"""
-	print("\n\n##### [ rnn_cell_backward ] #####\n")
+	report("\n\n##### [ rnn_cell_backward ] #####\n")
 
 	np.random.seed(1)
 	xt = np.random.randn(3,10)
@@ -648,31 +1019,31 @@ def check_rnn_backward():
 
 	da_next = np.random.randn(5,10)
 	gradients = rnn_cell_backward(da_next, cache)
-	print("gradients[\"dxt\"][1][2] =", gradients["dxt"][1][2])
-	print("gradients[\"dxt\"].shape =", gradients["dxt"].shape)
-	print("gradients[\"da_prev\"][2][3] =", gradients["da_prev"][2][3])
-	print("gradients[\"da_prev\"].shape =", gradients["da_prev"].shape)
-	print("gradients[\"dWax\"][3][1] =", gradients["dWax"][3][1])
-	print("gradients[\"dWax\"].shape =", gradients["dWax"].shape)
-	print("gradients[\"dWaa\"][1][2] =", gradients["dWaa"][1][2])
-	print("gradients[\"dWaa\"].shape =", gradients["dWaa"].shape)
-	print("gradients[\"dba\"][4] =", gradients["dba"][4])
-	print("gradients[\"dba\"].shape =", gradients["dba"].shape)
+	report("gradients[\"dxt\"][1][2] =", gradients["dxt"][1][2])
+	report("gradients[\"dxt\"].shape =", gradients["dxt"].shape)
+	report("gradients[\"da_prev\"][2][3] =", gradients["da_prev"][2][3])
+	report("gradients[\"da_prev\"].shape =", gradients["da_prev"].shape)
+	report("gradients[\"dWax\"][3][1] =", gradients["dWax"][3][1])
+	report("gradients[\"dWax\"].shape =", gradients["dWax"].shape)
+	report("gradients[\"dWaa\"][1][2] =", gradients["dWaa"][1][2])
+	report("gradients[\"dWaa\"].shape =", gradients["dWaa"].shape)
+	report("gradients[\"dba\"][4] =", gradients["dba"][4])
+	report("gradients[\"dba\"].shape =", gradients["dba"].shape)
 
 	### rnn_backward
 	"""
-	gradients["dx"][1][2] = [-2.07101689 -0.59255627  0.02466855  0.01483317]
-	gradients["dx"].shape = (3, 10, 4)
-	gradients["da0"][2][3] = -0.314942375127
-	gradients["da0"].shape = (5, 10)
-	gradients["dWax"][3][1] = 11.2641044965
-	gradients["dWax"].shape = (5, 3)
-	gradients["dWaa"][1][2] = 2.30333312658
-	gradients["dWaa"].shape = (5, 5)
-	gradients["dba"][4] = [-0.74747722]
-	gradients["dba"].shape = (5, 1)
+	gradients.dx[1][2] = [-2.07101689 -0.59255627  0.02466855  0.01483317]
+	gradients.dx.shape = (3, 10, 4)
+	gradients.da0[2][3] = -0.314942375127
+	gradients.da0.shape = (5, 10)
+	gradients.dWax[3][1] = 11.2641044965
+	gradients.dWax.shape = (5, 3)
+	gradients.dWaa[1][2] = 2.30333312658
+	gradients.dWaa.shape = (5, 5)
+	gradients.dba[4] = [-0.74747722]
+	gradients.dba.shape = (5, 1)
 	"""
-	print("\n\n##### [ rnn_backward ] #####\n")
+	report("\n\n##### [ rnn_backward ] #####\n")
 
 	np.random.seed(1)
 	x = np.random.randn(3,10,4)
@@ -687,16 +1058,16 @@ def check_rnn_backward():
 	da = np.random.randn(5, 10, 4)
 	gradients = rnn_backward(da, caches)
 
-	print("gradients[\"dx\"][1][2] =", gradients["dx"][1][2])
-	print("gradients[\"dx\"].shape =", gradients["dx"].shape)
-	print("gradients[\"da0\"][2][3] =", gradients["da0"][2][3])
-	print("gradients[\"da0\"].shape =", gradients["da0"].shape)
-	print("gradients[\"dWax\"][3][1] =", gradients["dWax"][3][1])
-	print("gradients[\"dWax\"].shape =", gradients["dWax"].shape)
-	print("gradients[\"dWaa\"][1][2] =", gradients["dWaa"][1][2])
-	print("gradients[\"dWaa\"].shape =", gradients["dWaa"].shape)
-	print("gradients[\"dba\"][4] =", gradients["dba"][4])
-	print("gradients[\"dba\"].shape =", gradients["dba"].shape)	
+	report("gradients.dx[1][2] =", gradients.dx[1][2])
+	report("gradients.dx.shape =", gradients.dx.shape)
+	report("gradients.da0[2][3] =", gradients.da0[2][3])
+	report("gradients.da0.shape =", gradients.da0.shape)
+	report("gradients.dWax[3][1] =", gradients.dWax[3][1])
+	report("gradients.dWax.shape =", gradients.dWax.shape)
+	report("gradients.dWaa[1][2] =", gradients.dWaa[1][2])
+	report("gradients.dWaa.shape =", gradients.dWaa.shape)
+	report("gradients.dba[4] =", gradients.dba[4])
+	report("gradients.dba.shape =", gradients.dba.shape)	
 
 
 def check_lstm_backward():
@@ -725,7 +1096,7 @@ def check_lstm_backward():
 	gradients["dbo"][4] = [ 0.13893342]
 	gradients["dbo"].shape = (5, 1)
 	"""
-	print("\n\n##### [ lstm_cell_backward ] #####\n")
+	report("\n\n##### [ lstm_cell_backward ] #####\n")
 
 	np.random.seed(1)
 	xt = np.random.randn(3,10)
@@ -742,60 +1113,63 @@ def check_lstm_backward():
 	Wy = np.random.randn(2,5)
 	by = np.random.randn(2,1)
 
-	parameters = {"Wf": Wf, "Wi": Wi, "Wo": Wo, "Wc": Wc, "Wy": Wy, "bf": bf, "bi": bi, "bo": bo, "bc": bc, "by": by}
+	parameters = pack_lstm_parameters({"Wf": Wf, "Wi": Wi, "Wo": Wo, "Wc": Wc, "Wy": Wy, "bf": bf, "bi": bi, "bo": bo, "bc": bc, "by": by})
 
 	a_next, c_next, yt, cache = lstm_cell_forward(xt, a_prev, c_prev, parameters)
 
 	da_next = np.random.randn(5,10)
 	dc_next = np.random.randn(5,10)
 	gradients = lstm_cell_backward(da_next, dc_next, cache)
-	print("gradients[\"dxt\"][1][2] =", gradients["dxt"][1][2])
-	print("gradients[\"dxt\"].shape =", gradients["dxt"].shape)
-	print("gradients[\"da_prev\"][2][3] =", gradients["da_prev"][2][3])
-	print("gradients[\"da_prev\"].shape =", gradients["da_prev"].shape)
-	print("gradients[\"dc_prev\"][2][3] =", gradients["dc_prev"][2][3])
-	print("gradients[\"dc_prev\"].shape =", gradients["dc_prev"].shape)
-	print("gradients[\"dWf\"][3][1] =", gradients["dWf"][3][1])
-	print("gradients[\"dWf\"].shape =", gradients["dWf"].shape)
-	print("gradients[\"dWi\"][1][2] =", gradients["dWi"][1][2])
-	print("gradients[\"dWi\"].shape =", gradients["dWi"].shape)
-	print("gradients[\"dWc\"][3][1] =", gradients["dWc"][3][1])
-	print("gradients[\"dWc\"].shape =", gradients["dWc"].shape)
-	print("gradients[\"dWo\"][1][2] =", gradients["dWo"][1][2])
-	print("gradients[\"dWo\"].shape =", gradients["dWo"].shape)
-	print("gradients[\"dbf\"][4] =", gradients["dbf"][4])
-	print("gradients[\"dbf\"].shape =", gradients["dbf"].shape)
-	print("gradients[\"dbi\"][4] =", gradients["dbi"][4])
-	print("gradients[\"dbi\"].shape =", gradients["dbi"].shape)
-	print("gradients[\"dbc\"][4] =", gradients["dbc"][4])
-	print("gradients[\"dbc\"].shape =", gradients["dbc"].shape)
-	print("gradients[\"dbo\"][4] =", gradients["dbo"][4])
-	print("gradients[\"dbo\"].shape =", gradients["dbo"].shape)
+	report("gradients[\"dxt\"][1][2] =", gradients["dxt"][1][2])
+	report("gradients[\"dxt\"].shape =", gradients["dxt"].shape)
+	report("gradients[\"da_prev\"][2][3] =", gradients["da_prev"][2][3])
+	report("gradients[\"da_prev\"].shape =", gradients["da_prev"].shape)
+	report("gradients[\"dc_prev\"][2][3] =", gradients["dc_prev"][2][3])
+	report("gradients[\"dc_prev\"].shape =", gradients["dc_prev"].shape)
+	report("gradients[\"dWf\"][3][1] =", gradients["dWf"][3][1])
+	report("gradients[\"dWf\"].shape =", gradients["dWf"].shape)
+	report("gradients[\"dWi\"][1][2] =", gradients["dWi"][1][2])
+	report("gradients[\"dWi\"].shape =", gradients["dWi"].shape)
+	report("gradients[\"dWc\"][3][1] =", gradients["dWc"][3][1])
+	report("gradients[\"dWc\"].shape =", gradients["dWc"].shape)
+	report("gradients[\"dWo\"][1][2] =", gradients["dWo"][1][2])
+	report("gradients[\"dWo\"].shape =", gradients["dWo"].shape)
+	report("gradients[\"dbf\"][4] =", gradients["dbf"][4])
+	report("gradients[\"dbf\"].shape =", gradients["dbf"].shape)
+	report("gradients[\"dbi\"][4] =", gradients["dbi"][4])
+	report("gradients[\"dbi\"].shape =", gradients["dbi"].shape)
+	report("gradients[\"dbc\"][4] =", gradients["dbc"][4])
+	report("gradients[\"dbc\"].shape =", gradients["dbc"].shape)
+	report("gradients[\"dbo\"][4] =", gradients["dbo"][4])
+	report("gradients[\"dbo\"].shape =", gradients["dbo"].shape)
 
 	### lstm_backward
 	"""
-	gradients["dx"][1][2] = [-0.00173313  0.08287442 -0.30545663 -0.43281115]
-	gradients["dx"].shape = (3, 10, 4)
-	gradients["da0"][2][3] = -0.095911501954
-	gradients["da0"].shape = (5, 10)
-	gradients["dWf"][3][1] = -0.0698198561274
-	gradients["dWf"].shape = (5, 8)
-	gradients["dWi"][1][2] = 0.102371820249
-	gradients["dWi"].shape = (5, 8)
-	gradients["dWc"][3][1] = -0.0624983794927
-	gradients["dWc"].shape = (5, 8)
-	gradients["dWo"][1][2] = 0.0484389131444
-	gradients["dWo"].shape = (5, 8)
-	gradients["dbf"][4] = [-0.0565788]
-	gradients["dbf"].shape = (5, 1)
-	gradients["dbi"][4] = [-0.15399065]
-	gradients["dbi"].shape = (5, 1)
-	gradients["dbc"][4] = [-0.29691142]
-	gradients["dbc"].shape = (5, 1)
-	gradients["dbo"][4] = [-0.29798344]
-	gradients["dbo"].shape = (5, 1)
+	Computed by this implementation once its gradients agreed with central finite differences,
+	not taken from a reference run:
+	gradients.dx[1][2] = [-0.03559116  0.16214986  0.55174645  0.4661557   0.43529021  0.16976809
+								0.62550261]
+	gradients.dx.shape = (3, 10, 7)
+	gradients.da0[2][3] = -0.172135353406
+	gradients.da0.shape = (5, 10)
+	gradients.dWf[3][1] = -0.226384675252
+	gradients.dWf.shape = (5, 8)
+	gradients.dWi[1][2] = 0.28679382245
+	gradients.dWi.shape = (5, 8)
+	gradients.dWc[3][1] = 0.102610633423
+	gradients.dWc.shape = (5, 8)
+	gradients.dWo[1][2] = 0.0641741607102
+	gradients.dWo.shape = (5, 8)
+	gradients.dbf[4] = [-0.13413502]
+	gradients.dbf.shape = (5, 1)
+	gradients.dbi[4] = [ 0.12896284]
+	gradients.dbi.shape = (5, 1)
+	gradients.dbc[4] = [ 0.32840044]
+	gradients.dbc.shape = (5, 1)
+	gradients.dbo[4] = [-0.77018489]
+	gradients.dbo.shape = (5, 1)
 	"""
-	print("\n\n##### [ lstm_backward ]#####\n")
+	report("\n\n##### [ lstm_backward ]#####\n")
 
 	np.random.seed(1)
 	x = np.random.randn(3,10,7)
@@ -809,43 +1183,141 @@ def check_lstm_backward():
 	Wc = np.random.randn(5, 5+3)
 	bc = np.random.randn(5,1)
 
-	parameters = {"Wf": Wf, "Wi": Wi, "Wo": Wo, "Wc": Wc, "Wy": Wy, "bf": bf, "bi": bi, "bo": bo, "bc": bc, "by": by}
+	parameters = pack_lstm_parameters({"Wf": Wf, "Wi": Wi, "Wo": Wo, "Wc": Wc, "bf": bf, "bi": bi, "bo": bo, "bc": bc})
 
 	a, y, c, caches = lstm_forward(x, a0, parameters)
 
-	da = np.random.randn(5, 10, 4)
+	da = np.random.randn(5, 10, 7)
 	gradients = lstm_backward(da, caches)
 
-	print("gradients[\"dx\"][1][2] =", gradients["dx"][1][2])
-	print("gradients[\"dx\"].shape =", gradients["dx"].shape)
-	print("gradients[\"da0\"][2][3] =", gradients["da0"][2][3])
-	print("gradients[\"da0\"].shape =", gradients["da0"].shape)
-	print("gradients[\"dWf\"][3][1] =", gradients["dWf"][3][1])
-	print("gradients[\"dWf\"].shape =", gradients["dWf"].shape)
-	print("gradients[\"dWi\"][1][2] =", gradients["dWi"][1][2])
-	print("gradients[\"dWi\"].shape =", gradients["dWi"].shape)
-	print("gradients[\"dWc\"][3][1] =", gradients["dWc"][3][1])
-	print("gradients[\"dWc\"].shape =", gradients["dWc"].shape)
-	print("gradients[\"dWo\"][1][2] =", gradients["dWo"][1][2])
-	print("gradients[\"dWo\"].shape =", gradients["dWo"].shape)
-	print("gradients[\"dbf\"][4] =", gradients["dbf"][4])
-	print("gradients[\"dbf\"].shape =", gradients["dbf"].shape)
-	print("gradients[\"dbi\"][4] =", gradients["dbi"][4])
-	print("gradients[\"dbi\"].shape =", gradients["dbi"].shape)
-	print("gradients[\"dbc\"][4] =", gradients["dbc"][4])
-	print("gradients[\"dbc\"].shape =", gradients["dbc"].shape)
-	print("gradients[\"dbo\"][4] =", gradients["dbo"][4])
-	print("gradients[\"dbo\"].shape =", gradients["dbo"].shape)
+	report("gradients.dx[1][2] =", gradients.dx[1][2])
+	report("gradients.dx.shape =", gradients.dx.shape)
+	report("gradients.da0[2][3] =", gradients.da0[2][3])
+	report("gradients.da0.shape =", gradients.da0.shape)
+	report("gradients.dWf[3][1] =", gradients.dWf[3][1])
+	report("gradients.dWf.shape =", gradients.dWf.shape)
+	report("gradients.dWi[1][2] =", gradients.dWi[1][2])
+	report("gradients.dWi.shape =", gradients.dWi.shape)
+	report("gradients.dWc[3][1] =", gradients.dWc[3][1])
+	report("gradients.dWc.shape =", gradients.dWc.shape)
+	report("gradients.dWo[1][2] =", gradients.dWo[1][2])
+	report("gradients.dWo.shape =", gradients.dWo.shape)
+	report("gradients.dbf[4] =", gradients.dbf[4])
+	report("gradients.dbf.shape =", gradients.dbf.shape)
+	report("gradients.dbi[4] =", gradients.dbi[4])
+	report("gradients.dbi.shape =", gradients.dbi.shape)
+	report("gradients.dbc[4] =", gradients.dbc[4])
+	report("gradients.dbc.shape =", gradients.dbc.shape)
+	report("gradients.dbo[4] =", gradients.dbo[4])
+	report("gradients.dbo.shape =", gradients.dbo.shape)
+
+
+# Checks run by main(), in order. Each one seeds the legacy global RNG itself,
+# since the values printed in their docstrings depend on np.random.seed(1) / np.random.randn
+CHECKS = (check_rnn_forward, check_lstm_forward, check_rnn_backward, check_lstm_backward)
+
+
+def run_check(check):
+	"""
+	Runs one of the checks and returns what it printed, so that all outputs are written in one go and in order,
+	including from checks run in other processes
 
+	Arguments:
+	check -- one of the functions of CHECKS
 
-def main():
-	check_rnn_forward()
+	Returns:
+	output -- text printed by the check
+	"""
+
+	with contextlib.redirect_stdout(io.StringIO()) as out:
+		check()
+
+	return out.getvalue()
+
+
+def bench_runs():
+	"""
+	Reads RNN_BENCH, set to time the checks instead of printing their results
+
+	Returns:
+	runs -- number of runs per check: the value of RNN_BENCH, 100 when it is not an integer,
+	        0 (run the checks normally) when it is not set or below 1
+	"""
 
-	check_lstm_forward()
+	value = os.environ.get("RNN_BENCH", "").strip()
+	try:
+		runs = int(value)
+	except ValueError:
+		return 100 if value else 0
+	return runs if runs > 0 else 0
 
-	check_rnn_backward()
 
-	check_lstm_backward()
+def benchmark_checks(runs):
+	"""
+	Times every check of CHECKS over several runs, in this process, with their reports turned off
+
+	Arguments:
+	runs -- number of times each check is run
+	"""
+
+	global QUIET
+	QUIET = True
+	try:
+		for check in CHECKS:
+			start = time.perf_counter_ns()
+			for _ in range(runs):
+				check()
+			elapsed = time.perf_counter_ns() - start
+			print("%s: %.1f us per run" % (check.__name__, elapsed / runs / 1000))
+	finally:
+		QUIET = False
+
+
+# Environment variables from which the BLAS libraries read their number of threads when they are loaded
+BLAS_THREAD_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def run_checks_in_parallel():
+	"""
+	Runs the checks of CHECKS in one worker process each. They share no state (each one seeds the RNG itself),
+	but starting the pool costs more than the checks themselves at the shapes they use.
+	The workers are spawned with one BLAS thread each, so that the parallel checks do not oversubscribe the cores.
+
+	Returns:
+	outputs -- list of the texts printed by the checks, in the order of CHECKS
+	"""
+
+	import multiprocessing
+	from concurrent.futures import ProcessPoolExecutor
+
+	# BLAS reads its thread count only when it is loaded, so rather than forking this process (whose BLAS is loaded),
+	# spawn the workers from an environment limiting it to one thread, which they inherit before importing NumPy
+	saved = {name: os.environ.get(name) for name in BLAS_THREAD_VARIABLES}
+	os.environ.update(dict.fromkeys(BLAS_THREAD_VARIABLES, "1"))
+	try:
+		with ProcessPoolExecutor(max_workers = len(CHECKS), mp_context = multiprocessing.get_context("spawn")) as executor:
+			return list(executor.map(run_check, CHECKS))
+	finally:
+		for name, value in saved.items():
+			if value is None:
+				os.environ.pop(name, None)
+			else:
+				os.environ[name] = value
+
+
+def main():
+	runs = bench_runs()
+	if runs:
+		benchmark_checks(runs)
+		return
+
+	# Run the checks in this process, or in worker processes when RNN_PARALLEL is set,
+	# and write their collected outputs in order, in one go
+	if os.environ.get("RNN_PARALLEL"):
+		outputs = run_checks_in_parallel()
+	else:
+		outputs = [run_check(check) for check in CHECKS]
+	sys.stdout.write("".join(outputs))
 
 
 if __name__ == '__main__':
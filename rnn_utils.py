@@ -1,12 +1,42 @@
 import numpy as np
 
-def softmax(x):
-    e_x = np.exp(x - np.max(x))
-    return e_x / e_x.sum(axis=0)
+def softmax(x, out=None):
+    # Integer inputs get a floating result, like np.exp would give them
+    if out is None:
+        out = np.empty(np.shape(x), dtype=np.result_type(x, np.float32))
+    # Shift every column by its own max so that no column can underflow to 0 / 0
+    e_x = np.subtract(x, np.max(x, axis=0, keepdims=True), out=out)
+    np.exp(e_x, out=e_x)
+    e_x /= e_x.sum(axis=0, keepdims=True)
+    return e_x
 
 
-def sigmoid(x):
-    return 1 / (1 + np.exp(-x))
+def sigmoid(x, out=None):
+    # sigmoid(x) = 0.5 * (1 + tanh(x / 2)): one vectorized transcendental, and no exp overflow
+    out = np.multiply(x, 0.5, out=out)
+    np.tanh(out, out=out)
+    out *= 0.5
+    out += 0.5
+    return out
+
+
+def tanh_backward(a, da, out=None):
+    # Gradient through a = tanh(z) given its output: (1 - a^2) * da, computed in place in out
+    out = np.multiply(a, a, out=out)
+    np.subtract(1, out, out=out)
+    out *= da
+    return out
+
+
+def cast_parameters(parameters, dtype):
+    """
+    Returns a copy of the parameters dictionary, or of a bound namedtuple of parameters, with every array
+    converted to a C-contiguous array of dtype (arrays that already match are not copied, None stays None).
+    """
+    cast = lambda value: None if value is None else np.ascontiguousarray(value, dtype=dtype)
+    if isinstance(parameters, tuple):
+        return type(parameters)(*map(cast, parameters))
+    return {key: cast(value) for key, value in parameters.items()}
 
 
 def initialize_adam(parameters) :